@@ -4,16 +4,103 @@ Your complete D&D game system with AI narration and MCP mechanics
 """
 
 import asyncio
+import contextlib
+import functools
+import re
+import sys
+import threading
+import anyio
+import httpx
 import openai
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+
+# System prompts for scene descriptions and combat narration
+DM_SYSTEM_MESSAGE = {"role": "system", "content": "You are a creative D&D Dungeon Master. Be vivid but concise (2-3 sentences)."}
+COMBAT_SYSTEM_MESSAGE = {"role": "system", "content": "You are an expert D&D Dungeon Master. Create vivid, exciting combat descriptions in 2-3 sentences."}
+
+# Sent as extra_body so llama.cpp-based servers reuse the KV cache of a repeated
+# prompt prefix (the system prompt) instead of re-processing it; others ignore it
+CACHE_PROMPT = {"cache_prompt": True}
+
+
+_ROLL_RE = re.compile(r"\s*(\d+\s*[dD]\s*\d+)\s*(?:([+-])\s*(\d+))?\s*$")
+
+# The rolls players type most often, already split
+_COMMON_ROLLS = {
+    "1d20": ("1d20", 0),
+    "1d8": ("1d8", 0),
+    "1d6": ("1d6", 0),
+    "2d6": ("2d6", 0),
+}
+
+
+@functools.lru_cache(maxsize=128)
+def parse_roll(dice_str):
+    """Split 'XdY+N' / 'XdY-N' input into (dice notation, modifier)."""
+    common = _COMMON_ROLLS.get(dice_str)
+    if common:
+        return common
+    
+    match = _ROLL_RE.match(dice_str)
+    if not match:
+        raise ValueError("use format like '1d20' or '2d6+3'")
+    
+    dice, sign, modifier = match.groups()
+    modifier = int(modifier) if modifier else 0
+    return dice, -modifier if sign == '-' else modifier
+
+
+async def ainput(prompt=""):
+    """Read a line from stdin without blocking the event loop.
+    
+    The read runs on a daemon thread (not asyncio.to_thread) so a pending
+    prompt never holds up interpreter exit after Ctrl+C.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def deliver(setter, value):
+        if not future.done():
+            setter(value)
+    
+    def read():
+        try:
+            line = input(prompt)
+        except Exception as e:
+            loop.call_soon_threadsafe(deliver, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(deliver, future.set_result, line)
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+# Errors that mean the MCP server connection is gone and should be reopened
+_CONNECTION_ERRORS = (ConnectionError, anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+def _is_connection_error(error):
+    """True if `error` means the MCP server connection is gone.
+    
+    A call in flight when the server dies fails with McpError(CONNECTION_CLOSED)
+    rather than a stream error, so that counts too.
+    """
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, _CONNECTION_ERRORS)
 
 class DnDGame:
     def __init__(self):
-        # LM Studio client
-        self.ai_client = openai.OpenAI(
+        # LM Studio client, keeping connections alive between requests
+        self.ai_client = openai.AsyncOpenAI(
             base_url="http://127.0.0.1:1234/v1",
-            api_key="lm-studio"
+            api_key="lm-studio",
+            http_client=httpx.AsyncClient(
+                timeout=60,
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+            )
         )
         
         # MCP server parameters
@@ -24,6 +111,7 @@ class DnDGame:
         
         self.character_id = None
         self.session = None
+        self._stack = contextlib.AsyncExitStack()
     
     async def start(self):
         """Start the D&D game session."""
@@ -36,11 +124,55 @@ class DnDGame:
         
         # Connect to MCP server
         print("🔌 Connecting to D&D server...")
-        self.read, self.write = await stdio_client(self.server_params).__aenter__()
-        self.session = await ClientSession(self.read, self.write).__aenter__()
-        await self.session.initialize()
+        await self._connect()
         print("✅ Connected!")
+    
+    async def _connect(self):
+        """Open the MCP stdio session; it stays open for the whole game."""
+        self.read, self.write = await self._stack.enter_async_context(stdio_client(self.server_params))
+        self.session = await self._stack.enter_async_context(ClientSession(self.read, self.write))
+        await self.session.initialize()
+    
+    async def _reconnect(self):
+        """Tear down a broken MCP session and start a fresh one."""
+        await self._stack.aclose()
+        self._stack = contextlib.AsyncExitStack()
+        await self._connect()
+    
+    async def _call_tool(self, name, arguments):
+        """Call an MCP tool, reconnecting once if the server connection dropped."""
+        try:
+            return await self.session.call_tool(name, arguments)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            print("🔌 Lost connection to D&D server, reconnecting...")
+            await self._reconnect()
+            return await self.session.call_tool(name, arguments)
+    
+    async def _call_tools(self, *calls):
+        """Call several (name, arguments) MCP tools concurrently.
         
+        The session can only be reopened from the task that opened it, so the
+        gathered calls never reconnect themselves; if the connection dropped,
+        it is reopened here and the whole batch is sent again.
+        """
+        results = await asyncio.gather(
+            *(self.session.call_tool(name, arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
+        if any(_is_connection_error(result) for result in results):
+            print("🔌 Lost connection to D&D server, reconnecting...")
+            await self._reconnect()
+            return await asyncio.gather(
+                *(self.session.call_tool(name, arguments) for name, arguments in calls)
+            )
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+    
     async def show_commands(self):
         """Show available commands."""
         print("\n🎮 Available Commands:")
@@ -59,7 +191,7 @@ class DnDGame:
         print("\n🧙‍♂️ Character Creation")
         print("=" * 20)
         
-        name = input("Character name: ").strip()
+        name = (await ainput("Character name: ")).strip()
         if not name:
             name = "Hero"
         
@@ -69,34 +201,51 @@ class DnDGame:
         print("3. Rogue (Stealth and skills)")
         print("4. Cleric (Healing and support)")
         
-        class_choice = input("Choose (1-4): ").strip()
+        class_choice = (await ainput("Choose (1-4): ")).strip()
         classes = {"1": "Fighter", "2": "Wizard", "3": "Rogue", "4": "Cleric"}
         char_class = classes.get(class_choice, "Fighter")
         
-        level = int(input("Level (1-10): ") or "1")
+        level = int(await ainput("Level (1-10): ") or "1")
+        
+        # Start the AI description now so it is generated while we roll
+        description_task = asyncio.create_task(
+            self._ai_text(f"a {char_class} named {name}", "character description")
+        )
         
         print(f"\n🎲 Rolling ability scores for {name} the {char_class}...")
         
         # Roll ability scores using MCP
-        abilities = {}
-        for ability in ["strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"]:
-            # Roll 4d6, drop lowest (simulate this with multiple 1d6 rolls)
-            rolls = []
-            for _ in range(4):
-                result = await self.session.call_tool("roll_dice", {"dice_notation": "1d6"})
-                rolls.append(result.structuredContent["individual_rolls"][0])
-            rolls.sort(reverse=True)
-            score = sum(rolls[:3])
-            abilities[ability] = score
-            print(f"  {ability.capitalize()}: {score}")
-        
-        # Create character
-        result = await self.session.call_tool("create_character", {
-            "name": name,
-            "character_class": char_class,
-            "level": level,
-            **abilities
-        })
+        ability_names = ["strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"]
+        
+        try:
+            # Roll 4d6 for every ability in a single batched call (24 x 1d6)
+            result = await self._call_tool("roll_many", {
+                "dice_notation": "1d6",
+                "count": 4 * len(ability_names)
+            })
+            d6_rolls = [roll["individual_rolls"][0] for roll in result.structuredContent["result"]]
+            
+            abilities = {}
+            for i, ability in enumerate(ability_names):
+                # Drop the lowest of the four rolls
+                rolls = sorted(d6_rolls[i * 4:(i + 1) * 4])
+                score = sum(rolls[1:])
+                abilities[ability] = score
+                print(f"  {ability.capitalize()}: {score}")
+            
+            # Create character
+            result = await self._call_tool("create_character", {
+                "name": name,
+                "character_class": char_class,
+                "level": level,
+                **abilities
+            })
+        except BaseException:
+            # Nobody will print the description now; stop it, and retrieve its
+            # outcome so a failed AI request isn't reported as never retrieved
+            description_task.cancel()
+            description_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            raise
         
         char_data = result.structuredContent
         self.character_id = char_data["id"]
@@ -104,25 +253,20 @@ class DnDGame:
         print(f"\n✅ Created {char_data['name']} the {char_class}!")
         print(f"   AC: {char_data['armor_class']}, HP: {char_data['hit_points']}")
         
-        # Get AI description of character
-        await self.ai_describe(f"a {char_class} named {name}", "character description")
+        # Show the AI description of the character
+        try:
+            print(f"🎭 {await description_task}")
+        except Exception as e:
+            print(f"❌ AI description failed: {e}")
     
     async def roll_dice(self, dice_str):
         """Roll dice with modifiers."""
         try:
             # Parse dice notation
-            if '+' in dice_str:
-                dice, modifier = dice_str.split('+')
-                modifier = int(modifier)
-            elif '-' in dice_str:
-                dice, modifier = dice_str.split('-')
-                modifier = -int(modifier)
-            else:
-                dice = dice_str
-                modifier = 0
+            dice, modifier = parse_roll(dice_str)
             
-            result = await self.session.call_tool("roll_dice", {
-                "dice_notation": dice.strip(),
+            result = await self._call_tool("roll_dice", {
+                "dice_notation": dice,
                 "modifier": modifier
             })
             
@@ -148,7 +292,7 @@ class DnDGame:
             bonus = int(bonus_str)
             ac = int(ac_str)
             
-            result = await self.session.call_tool("attack_roll", {
+            result = await self._call_tool("attack_roll", {
                 "attacker_bonus": bonus,
                 "target_ac": ac,
                 "damage_dice": "1d8",
@@ -168,6 +312,14 @@ class DnDGame:
             print("❌ Usage: attack <bonus> <target_ac>")
             print("Example: attack 5 15")
     
+    async def _attack_command(self, args):
+        """Handle 'attack <bonus> <target_ac>'."""
+        parts = args.split()
+        if len(parts) >= 2:
+            await self.attack_roll(parts[0], parts[1])
+        else:
+            print("❌ Usage: attack <bonus> <target_ac>")
+    
     async def skill_check(self, skill):
         """Perform a skill check."""
         difficulty = 15  # Standard DC
@@ -175,7 +327,7 @@ class DnDGame:
         # Get character modifier if we have a character
         modifier = 0
         if self.character_id:
-            char_result = await self.session.call_tool("get_character_info", {"character_id": self.character_id})
+            char_result = await self._call_tool("get_character_info", {"character_id": self.character_id})
             char_data = char_result.structuredContent
             
             # Simplified modifier based on skill
@@ -192,7 +344,7 @@ class DnDGame:
                 modifier = (ability_score - 10) // 2
         
         # Roll the dice
-        result = await self.session.call_tool("roll_dice", {
+        result = await self._call_tool("roll_dice", {
             "dice_notation": "1d20",
             "modifier": modifier
         })
@@ -213,18 +365,18 @@ class DnDGame:
         print(f"\n⚔️  Combat Encounter: You vs {enemy}")
         print("=" * 30)
         
-        # Initiative
-        init_result = await self.session.call_tool("roll_dice", {"dice_notation": "1d20", "modifier": 2})
-        init_data = init_result.structuredContent
-        print(f"🎲 Initiative: {init_data['total']}")
-        
-        # Your attack
-        attack_result = await self.session.call_tool("attack_roll", {
-            "attacker_bonus": 5,
-            "target_ac": 13,
-            "damage_dice": "1d8",
-            "damage_bonus": 3
-        })
+        # Initiative and your attack are independent, so roll them together
+        init_result, attack_result = await self._call_tools(
+            ("roll_quick", {"dice_notation": "1d20", "modifier": 2}),
+            ("attack_roll", {
+                "attacker_bonus": 5,
+                "target_ac": 13,
+                "damage_dice": "1d8",
+                "damage_bonus": 3
+            })
+        )
+        
+        print(f"🎲 Initiative: {init_result.structuredContent['result']}")
         
         attack_data = attack_result.structuredContent
         print(f"⚔️  Your attack: {attack_data['description']}")
@@ -235,19 +387,49 @@ class DnDGame:
         else:
             prompt = f"Narrate a D&D combat where the player's attack misses a {enemy}. Describe the near miss dramatically!"
         
-        response = self.ai_client.chat.completions.create(
+        await self._ai_stream([
+            COMBAT_SYSTEM_MESSAGE,
+            {"role": "user", "content": prompt}
+        ], max_tokens=100)
+    
+    async def ai_describe(self, scene, context="scene"):
+        """Get AI description of a scene."""
+        try:
+            await self._ai_stream(self._describe_messages(scene, context), max_tokens=80)
+            
+        except Exception as e:
+            print(f"❌ AI description failed: {e}")
+    
+    async def _ai_text(self, scene, context="scene"):
+        """Ask LM Studio to describe a scene and return the full text."""
+        response = await self.ai_client.chat.completions.create(
             model="local-model",
-            messages=[
-                {"role": "system", "content": "You are an expert D&D Dungeon Master. Create vivid, exciting combat descriptions in 2-3 sentences."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=100
+            messages=self._describe_messages(scene, context),
+            max_tokens=80,
+            extra_body=CACHE_PROMPT
         )
         
-        print(f"🎭 {response.choices[0].message.content}")
+        return response.choices[0].message.content
     
-    async def ai_describe(self, scene, context="scene"):
-        """Get AI description of a scene."""
+    async def _ai_stream(self, messages, max_tokens):
+        """Print an LM Studio completion token by token as it is generated."""
+        stream = await self.ai_client.chat.completions.create(
+            model="local-model",
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+            extra_body=CACHE_PROMPT
+        )
+        
+        sys.stdout.write("🎭 ")
+        async for chunk in stream:
+            if chunk.choices:
+                sys.stdout.write(chunk.choices[0].delta.content or "")
+                sys.stdout.flush()
+        sys.stdout.write("\n")
+    
+    def _describe_messages(self, scene, context):
+        """Build the chat messages for describing a scene."""
         prompts = {
             "scene": f"Describe this D&D scene: {scene}",
             "character description": f"Describe the appearance and personality of {scene} in 2-3 sentences",
@@ -259,20 +441,10 @@ class DnDGame:
         
         prompt = prompts.get(context, f"Describe: {scene}")
         
-        try:
-            response = self.ai_client.chat.completions.create(
-                model="local-model",
-                messages=[
-                    {"role": "system", "content": "You are a creative D&D Dungeon Master. Be vivid but concise (2-3 sentences)."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=80
-            )
-            
-            print(f"🎭 {response.choices[0].message.content}")
-            
-        except Exception as e:
-            print(f"❌ AI description failed: {e}")
+        return [
+            DM_SYSTEM_MESSAGE,
+            {"role": "user", "content": prompt}
+        ]
     
     async def show_character(self):
         """Show character information."""
@@ -280,7 +452,7 @@ class DnDGame:
             print("❌ No character created yet. Use 'create' command.")
             return
         
-        result = await self.session.call_tool("get_character_info", {"character_id": self.character_id})
+        result = await self._call_tool("get_character_info", {"character_id": self.character_id})
         char_data = result.structuredContent
         
         print(f"\n🧙‍♂️ {char_data['name']} - Level {char_data['level']} {char_data['character_class']}")
@@ -292,41 +464,39 @@ class DnDGame:
         """Main game loop."""
         await self.show_commands()
         
+        # Commands without arguments, and commands that take the rest of the line
+        commands = {
+            "help": self.show_commands,
+            "create": self.create_character,
+            "character": self.show_character,
+        }
+        arg_commands = {
+            "roll": self.roll_dice,
+            "attack": self._attack_command,
+            "check": self.skill_check,
+            "describe": self.ai_describe,
+            "combat": self.combat_encounter,
+        }
+        
         while True:
             try:
-                command = input("\n🎲 > ").strip().lower()
+                # Only the command word is lowercased; arguments keep their case for the AI
+                command, _, args = (await ainput("\n🎲 > ")).strip().partition(" ")
+                command = command.lower()
+                args = args.strip()
                 
                 if command == "quit":
                     print("\n👋 Thanks for playing D&D!")
                     break
-                elif command == "help":
-                    await self.show_commands()
-                elif command == "create":
-                    await self.create_character()
-                elif command == "character":
-                    await self.show_character()
-                elif command.startswith("roll "):
-                    dice = command[5:]
-                    await self.roll_dice(dice)
-                elif command.startswith("attack "):
-                    parts = command[7:].split()
-                    if len(parts) >= 2:
-                        await self.attack_roll(parts[0], parts[1])
-                    else:
-                        print("❌ Usage: attack <bonus> <target_ac>")
-                elif command.startswith("check "):
-                    skill = command[6:]
-                    await self.skill_check(skill)
-                elif command.startswith("describe "):
-                    scene = command[9:]
-                    await self.ai_describe(scene)
-                elif command.startswith("combat "):
-                    enemy = command[7:]
-                    await self.combat_encounter(enemy)
+                elif command in commands:
+                    await commands[command]()
+                elif command in arg_commands and args:
+                    await arg_commands[command](args)
                 else:
                     print("❓ Unknown command. Type 'help' for available commands.")
             
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                # Ctrl+C at the prompt arrives as a cancellation of the pending read
                 print("\n\n👋 Thanks for playing!")
                 break
             except Exception as e:
@@ -334,10 +504,8 @@ class DnDGame:
     
     async def cleanup(self):
         """Clean up connections."""
-        if self.session:
-            await self.session.__aexit__(None, None, None)
-        if hasattr(self, 'read'):
-            await self.read.__aexit__(None, None, None)
+        await self._stack.aclose()
+        await self.ai_client.close()
 
 async def main():
     """Main game function."""
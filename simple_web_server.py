@@ -1,148 +1,199 @@
-
 """
 simple_web_server.py - Simple web interface for testing D&D tools
 Run this to get a basic web interface for your D&D server
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
-import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import uvicorn
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-import threading
-import urllib.parse
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
+from starlette.routing import Route
 
-class DnDWebHandler(BaseHTTPRequestHandler):
-    
-    def do_GET(self):
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head><title>D&D MCP Server Test</title></head>
-            <body>
-                <h1>🎲 D&D MCP Server Test Interface</h1>
-                
-                <h2>Roll Dice</h2>
-                <button onclick="rollDice('1d20', 0)">Roll 1d20</button>
-                <button onclick="rollDice('2d6', 3)">Roll 2d6+3</button>
-                <button onclick="rollDice('1d8', 2)">Roll 1d8+2</button>
-                
-                <h2>Combat</h2>
-                <button onclick="attackRoll(5, 15)">Attack (+5 vs AC 15)</button>
-                <button onclick="attackRoll(3, 12)">Attack (+3 vs AC 12)</button>
-                
-                <h2>Results</h2>
-                <div id="results"></div>
-                
-                <script>
-                async function rollDice(dice, modifier) {
-                    const response = await fetch('/api/roll', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({dice: dice, modifier: modifier})
-                    });
-                    const result = await response.json();
-                    showResult(`🎲 ${dice}+${modifier}: ${result.rolls} = ${result.total}`);
-                }
-                
-                async function attackRoll(bonus, ac) {
-                    const response = await fetch('/api/attack', {
-                        method: 'POST', 
-                        headers: {'Content-Type': 'application/json'},
-                        body: JSON.stringify({bonus: bonus, ac: ac})
-                    });
-                    const result = await response.json();
-                    showResult(`⚔️ ${result.description}`);
-                }
-                
-                function showResult(text) {
-                    document.getElementById('results').innerHTML = '<p>' + text + '</p>' + 
-                        document.getElementById('results').innerHTML;
-                }
-                </script>
-            </body>
-            </html>
-            """
-            self.wfile.write(html.encode())
-            
-        else:
-            self.send_response(404)
-            self.end_headers()
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    import json
     
-    def do_POST(self):
-        if self.path == '/api/roll':
-            self.handle_roll()
-        elif self.path == '/api/attack':
-            self.handle_attack()
-        else:
-            self.send_response(404)
-            self.end_headers()
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
     
-    def handle_roll(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
-            
-            # This is a simplified version - in reality you'd call the MCP server
-            import random
-            dice_parts = data['dice'].split('d')
-            num_dice = int(dice_parts[0]) 
-            sides = int(dice_parts[1])
-            
-            rolls = [random.randint(1, sides) for _ in range(num_dice)]
-            total = sum(rolls) + data['modifier']
-            
-            result = {'rolls': rolls, 'total': total}
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode())
-            
-        except Exception as e:
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(str(e).encode())
-    
-    def handle_attack(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
-            
-            import random
-            roll = random.randint(1, 20)
-            total = roll + data['bonus']
-            hit = total >= data['ac']
-            
-            if hit:
-                damage = random.randint(1, 8) + 2
-                description = f"Hit! {roll} + {data['bonus']} = {total} vs AC {data['ac']}. Damage: {damage}"
-            else:
-                description = f"Miss! {roll} + {data['bonus']} = {total} vs AC {data['ac']}"
-            
-            result = {'description': description, 'hit': hit}
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode())
-            
-        except Exception as e:
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(str(e).encode())
+    json_loads = json.loads
+
+server_params = StdioServerParameters(
+    command="python",
+    args=["dnd_server.py"]
+)
+
+INDEX_HTML = """
+<!DOCTYPE html>
+<html>
+<head><title>D&D MCP Server Test</title></head>
+<body>
+    <h1>🎲 D&D MCP Server Test Interface</h1>
+
+    <h2>Roll Dice</h2>
+    <button onclick="rollDice('1d20', 0)">Roll 1d20</button>
+    <button onclick="rollDice('2d6', 3)">Roll 2d6+3</button>
+    <button onclick="rollDice('1d8', 2)">Roll 1d8+2</button>
+
+    <h2>Combat</h2>
+    <button onclick="attackRoll(5, 15)">Attack (+5 vs AC 15)</button>
+    <button onclick="attackRoll(3, 12)">Attack (+3 vs AC 12)</button>
+    <button onclick="attackBatch(5, 15, 10000)">Simulate 10,000 attacks (+5 vs AC 15)</button>
+
+    <h2>Results</h2>
+    <div id="results"></div>
+
+    <script>
+    async function rollDice(dice, modifier) {
+        const response = await fetch('/api/roll', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({dice: dice, modifier: modifier})
+        });
+        const result = await response.json();
+        showResult(`🎲 ${dice}+${modifier}: ${result.rolls} = ${result.total}`);
+    }
+
+    async function attackRoll(bonus, ac) {
+        const response = await fetch('/api/attack', {
+            method: 'POST', 
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({bonus: bonus, ac: ac})
+        });
+        const result = await response.json();
+        showResult(`⚔️ ${result.description}`);
+    }
+
+    async function attackBatch(bonus, ac, n) {
+        const response = await fetch('/api/attack_batch', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({bonus: bonus, ac: ac, n: n})
+        });
+        const result = await response.json();
+        showResult(`📊 ${n} attacks: ${(result.hit_rate * 100).toFixed(1)}% hit, ${result.average_damage.toFixed(2)} damage per attack`);
+    }
+
+    function showResult(text) {
+        document.getElementById('results').innerHTML = '<p>' + text + '</p>' + 
+            document.getElementById('results').innerHTML;
+    }
+    </script>
+</body>
+</html>
+"""
+INDEX_HTML_BYTES = INDEX_HTML.encode("utf-8")
+
+
+async def index(request):
+    # Pre-encoded once at import; Starlette sets Content-Length from it
+    return HTMLResponse(INDEX_HTML_BYTES)
+
+
+def json_response(obj):
+    return Response(json_dumps(obj), media_type="application/json")
+
+
+# /api/roll always answers {"rolls": [...], "total": N}, so it is assembled from fixed pieces
+ROLL_PREFIX = b'{"rolls":['
+ROLL_MIDDLE = b'],"total":'
+ROLL_SUFFIX = b'}'
+
+
+def roll_response(rolls, total):
+    body = b"".join((ROLL_PREFIX, ",".join(map(str, rolls)).encode(), ROLL_MIDDLE, str(total).encode(), ROLL_SUFFIX))
+    return Response(body, media_type="application/json")
+
+
+async def call_tool(request, name, arguments):
+    """Call a tool on the shared MCP session and return its structured result."""
+    result = await request.app.state.session.call_tool(name, arguments)
+    if result.isError:
+        raise RuntimeError(result.content[0].text)
+    return result.structuredContent
+
+
+async def handle_roll(request):
+    try:
+        data = json_loads(await request.body())
+        
+        roll = await call_tool(request, "roll_dice", {
+            "dice_notation": data['dice'],
+            "modifier": data['modifier']
+        })
+        
+        return roll_response(roll['individual_rolls'], roll['total'])
+        
+    except Exception as e:
+        return PlainTextResponse(str(e), status_code=500)
+
+
+async def handle_attack(request):
+    try:
+        data = json_loads(await request.body())
+        
+        attack = await call_tool(request, "attack_roll", {
+            "attacker_bonus": data['bonus'],
+            "target_ac": data['ac'],
+            "damage_dice": "1d8",
+            "damage_bonus": 2
+        })
+        
+        result = {'description': attack['description'], 'hit': attack['hit']}
+        
+        return json_response(result)
+        
+    except Exception as e:
+        return PlainTextResponse(str(e), status_code=500)
+
+
+async def handle_attack_batch(request):
+    try:
+        data = json_loads(await request.body())
+        
+        result = await call_tool(request, "simulate_attacks", {
+            "attacker_bonus": data['bonus'],
+            "target_ac": data['ac'],
+            "damage_dice": "1d8",
+            "damage_bonus": 2,
+            "count": data['n']
+        })
+        
+        return json_response(result)
+        
+    except Exception as e:
+        return PlainTextResponse(str(e), status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start dnd_server.py once and share its MCP session across all requests."""
+    async with AsyncExitStack() as stack:
+        read, write = await stack.enter_async_context(stdio_client(server_params))
+        app.state.session = await stack.enter_async_context(ClientSession(read, write))
+        await app.state.session.initialize()
+        yield
+
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/', index),
+    Route('/api/roll', handle_roll, methods=['POST']),
+    Route('/api/attack', handle_attack, methods=['POST']),
+    Route('/api/attack_batch', handle_attack_batch, methods=['POST']),
+])
+
 
 def run_web_server():
-    server = HTTPServer(('localhost', 8080), DnDWebHandler)
     print("🌐 D&D Web Interface running at: http://localhost:8080")
-    server.serve_forever()
+    # uvloop/httptools are used automatically where uvicorn[standard] provides them
+    # Hold idle keep-alive connections long enough to cover a burst of button clicks;
+    # the local dashboard has no use for the per-response Date/Server headers
+    uvicorn.run(app, host='localhost', port=8080, timeout_keep_alive=30,
+                date_header=False, server_header=False)
 
 if __name__ == "__main__":
     run_web_server()
\ No newline at end of file
@@ -4,21 +4,48 @@ Run with: uv run python cli_dnd.py
 """
 
 import asyncio
+import sys
+from collections import OrderedDict
+from pathlib import Path
+import httpx
 import openai
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+# Share the game CLI's helpers when run as a script from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dnd_cli import CACHE_PROMPT, ainput, parse_roll
+
+# System prompts for scene descriptions and combat narration
+SYSTEM_DM = {"role": "system", "content": "You are a D&D Dungeon Master. Describe scenes vividly in 2-3 sentences."}
+SYSTEM_NARRATOR = {"role": "system", "content": "You are a D&D narrator. Be dramatic but brief."}
+
+# Streamed tokens are flushed to the terminal in groups of this many
+STREAM_FLUSH_EVERY = 4
+
+# Scene descriptions remembered per session (least recently used dropped first)
+DESCRIBE_CACHE_SIZE = 128
+
+
 class DnDCLI:
     def __init__(self):
-        self.ai_client = openai.OpenAI(
+        # One async client for every LM Studio call, so connections are reused
+        self.ai_client = openai.AsyncOpenAI(
             base_url="http://127.0.0.1:1234/v1",
-            api_key="lm-studio"
+            api_key="lm-studio",
+            http_client=httpx.AsyncClient(
+                timeout=60,
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+            )
         )
         
         self.server_params = StdioServerParameters(
             command="uv",
             args=["run", "python", "dnd_server.py"]
         )
+        
+        # Scene -> description, so repeated 'describe' requests skip LM Studio
+        self.describe_cache = OrderedDict()
     
     async def start(self):
         """Start the CLI session."""
@@ -29,6 +56,7 @@ class DnDCLI:
         print("  attack <bonus> <ac> - Attack roll")
         print("  describe <scene> - AI describes a scene")
         print("  combat <enemy> - Quick combat")
+        print("  clear_cache - Forget cached scene descriptions")
         print("  quit - Exit")
         print()
         
@@ -38,10 +66,13 @@ class DnDCLI:
                 
                 while True:
                     try:
-                        command = input("🎲 > ").strip()
+                        command = (await ainput("🎲 > ")).strip()
                         
                         if command == "quit":
                             break
+                        elif command == "clear_cache":
+                            self.describe_cache.clear()
+                            print("🧹 Description cache cleared")
                         elif command.startswith("roll "):
                             await self.handle_roll(session, command[5:])
                         elif command.startswith("attack "):
@@ -53,29 +84,21 @@ class DnDCLI:
                         else:
                             print("❓ Unknown command")
                     
-                    except KeyboardInterrupt:
+                    except (KeyboardInterrupt, asyncio.CancelledError):
                         break
                     except Exception as e:
                         print(f"❌ Error: {e}")
         
+        await self.ai_client.close()
         print("\n👋 Goodbye, adventurer!")
     
     async def handle_roll(self, session, dice_str):
         """Handle dice rolling command."""
         try:
-            # Parse dice notation (simple)
-            if '+' in dice_str:
-                dice, modifier = dice_str.split('+')
-                modifier = int(modifier)
-            elif '-' in dice_str:
-                dice, modifier = dice_str.split('-')
-                modifier = -int(modifier)
-            else:
-                dice = dice_str
-                modifier = 0
+            dice, modifier = parse_roll(dice_str)
             
             result = await session.call_tool("roll_dice", {
-                "dice_notation": dice.strip(),
+                "dice_notation": dice,
                 "modifier": modifier
             })
             
@@ -107,40 +130,49 @@ class DnDCLI:
     
     async def handle_describe(self, scene):
         """Handle description command using AI."""
+        cached = self.describe_cache.get(scene)
+        if cached is not None:
+            self.describe_cache.move_to_end(scene)
+            print(f"🏰 {cached}")
+            return
+        
         try:
-            response = self.ai_client.chat.completions.create(
-                model="local-model",
-                messages=[
-                    {"role": "system", "content": "You are a D&D Dungeon Master. Describe scenes vividly in 2-3 sentences."},
-                    {"role": "user", "content": f"Describe this D&D scene: {scene}"}
-                ],
-                max_tokens=120
-            )
+            description = await self.stream_completion("🏰 ", [
+                SYSTEM_DM,
+                {"role": "user", "content": f"Describe this D&D scene: {scene}"}
+            ], max_tokens=120)
             
-            print(f"🏰 {response.choices[0].message.content}")
+            # An empty reply is not worth repeating, so ask again next time
+            if description.strip():
+                self.describe_cache[scene] = description
+                if len(self.describe_cache) > DESCRIBE_CACHE_SIZE:
+                    self.describe_cache.popitem(last=False)
             
         except Exception as e:
             print(f"❌ AI error: {e}")
     
     async def handle_combat(self, session, enemy):
         """Handle quick combat encounter."""
-        print(f"\n⚔️  Combat vs {enemy}")
+        # Initiative and attack don't depend on each other, so roll them together
+        init_result, attack_result = await asyncio.gather(
+            session.call_tool("roll_dice", {"dice_notation": "1d20", "modifier": 2}),
+            session.call_tool("attack_roll", {
+                "attacker_bonus": 4,
+                "target_ac": 13,
+                "damage_dice": "1d8",
+                "damage_bonus": 2
+            })
+        )
         
-        # Roll initiative
-        init_result = await session.call_tool("roll_dice", {"dice_notation": "1d20", "modifier": 2})
         init_data = init_result.structuredContent
-        print(f"Initiative: {init_data['total']}")
-        
-        # Attack
-        attack_result = await session.call_tool("attack_roll", {
-            "attacker_bonus": 4,
-            "target_ac": 13,
-            "damage_dice": "1d8",
-            "damage_bonus": 2
-        })
-        
         attack_data = attack_result.structuredContent
-        print(f"Attack: {attack_data['description']}")
+        
+        # Status lines go out in a single write
+        sys.stdout.write(
+            f"\n⚔️  Combat vs {enemy}\n"
+            f"Initiative: {init_data['total']}\n"
+            f"Attack: {attack_data['description']}\n"
+        )
         
         # AI narration
         try:
@@ -149,19 +181,38 @@ class DnDCLI:
             else:
                 prompt = f"Narrate a missed attack against a {enemy}"
             
-            response = self.ai_client.chat.completions.create(
-                model="local-model",
-                messages=[
-                    {"role": "system", "content": "You are a D&D narrator. Be dramatic but brief."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=80
-            )
-            
-            print(f"📖 {response.choices[0].message.content}")
+            await self.stream_completion("📖 ", [
+                SYSTEM_NARRATOR,
+                {"role": "user", "content": prompt}
+            ], max_tokens=80)
             
         except Exception as e:
             print(f"❌ Narration failed: {e}")
+    
+    async def stream_completion(self, prefix, messages, max_tokens):
+        """Print an LM Studio completion token by token and return the full text."""
+        stream = await self.ai_client.chat.completions.create(
+            model="local-model",
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+            extra_body=CACHE_PROMPT
+        )
+        
+        sys.stdout.write(prefix)
+        parts = []
+        async for chunk in stream:
+            if chunk.choices:
+                text = chunk.choices[0].delta.content or ""
+                sys.stdout.write(text)
+                parts.append(text)
+                # Flush every few tokens rather than on each one
+                if len(parts) % STREAM_FLUSH_EVERY == 0:
+                    sys.stdout.flush()
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        
+        return "".join(parts)
 
 
 async def main():
@@ -4,6 +4,7 @@ This is the code for the test_server.py file you asked about
 """
 
 import asyncio
+import sys
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
@@ -35,6 +36,28 @@ async def test_dnd_server():
                 data = result.structuredContent
                 print(f"   1d20+5: rolled {data['individual_rolls'][0]} + 5 = {data['total']}")
                 
+                # Test batched rolls
+                print("\n🎲 Testing batched rolls...")
+                result = await session.call_tool("roll_many", {
+                    "dice_notation": "1d6",
+                    "count": 24
+                })
+                
+                rolls = result.structuredContent["result"]
+                assert len(rolls) == 24, f"expected 24 rolls, got {len(rolls)}"
+                assert all(1 <= roll["total"] <= 6 for roll in rolls), rolls
+                print(f"   24 x 1d6: {[roll['total'] for roll in rolls]}")
+                
+                # Test total-only rolls
+                result = await session.call_tool("roll_quick", {
+                    "dice_notation": "1d20",
+                    "modifier": 2
+                })
+                
+                total = result.structuredContent["result"]
+                assert 3 <= total <= 22, total
+                print(f"   Quick 1d20+2: {total}")
+                
                 # Test combat
                 print("\n⚔️ Testing combat...")
                 combat = await session.call_tool("attack_roll", {
@@ -47,6 +70,34 @@ async def test_dnd_server():
                 combat_data = combat.structuredContent
                 print(f"   {combat_data['description']}")
                 
+                # Test batch attack simulation
+                print("\n📊 Testing attack simulation...")
+                simulation = await session.call_tool("simulate_attacks", {
+                    "attacker_bonus": 4,
+                    "target_ac": 15,
+                    "damage_dice": "1d8",
+                    "damage_bonus": 2,
+                    "count": 10000
+                })
+                
+                sim = simulation.structuredContent
+                hits, crits = sim["hits"], sim["critical_hits"]
+                assert sim["attacks"] == 10000, sim
+                assert 0 < crits <= hits <= sim["attacks"], sim
+                # Every hit deals 1d8+2 and a crit adds another 1d8
+                assert hits * 3 + crits <= sim["total_damage"] <= hits * 10 + crits * 8, sim
+                assert sim["hit_rate"] == hits / sim["attacks"], sim
+                assert sim["average_damage"] == sim["total_damage"] / sim["attacks"], sim
+                print(f"   10,000 attacks: {hits} hits ({crits} critical), {sim['total_damage']} damage")
+                
+                rejected = await session.call_tool("simulate_attacks", {
+                    "attacker_bonus": 4,
+                    "target_ac": 15,
+                    "count": 0
+                })
+                assert rejected.isError, "count=0 should be rejected"
+                print(f"   count=0 rejected: {rejected.content[0].text}")
+                
                 # Test character creation
                 print("\n🧙‍♂️ Testing character creation...")
                 character = await session.call_tool("create_character", {
@@ -67,14 +118,22 @@ async def test_dnd_server():
                 print("\n🎉 Your D&D server is working perfectly!")
                 print("   ✓ Dice rolling")
                 print("   ✓ Combat mechanics") 
+                print("   ✓ Attack simulation")
                 print("   ✓ Character creation")
                 
+                return True
+                
     except Exception as e:
-        print(f"❌ Error: {e}")
+        # Failures inside the MCP client's task group arrive wrapped in an ExceptionGroup
+        while isinstance(e, ExceptionGroup) and len(e.exceptions) == 1:
+            e = e.exceptions[0]
+        print(f"❌ Error: {type(e).__name__}: {e}")
         print("\nTroubleshooting:")
         print("1. Make sure you have: pip install 'mcp[cli]' pydantic")
         print("2. Make sure dnd_server.py exists")
         print("3. Check that the server code is correct")
+        return False
 
 if __name__ == "__main__":
-    asyncio.run(test_dnd_server())
+    if not asyncio.run(test_dnd_server()):
+        sys.exit(1)
@@ -9,6 +9,11 @@ import openai
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from dnd_cli import CACHE_PROMPT
+
+# System prompt for the narration step
+SYSTEM_NARRATOR = {"role": "system", "content": "You are a D&D narrator. Write 1-2 vivid sentences."}
+
 async def test_dnd_integration():
     """Test the full D&D experience with MCP + LM Studio."""
     
@@ -18,12 +23,13 @@ async def test_dnd_integration():
     # Test 1: LM Studio
     print("1. Testing LM Studio...")
     try:
-        ai_client = openai.OpenAI(
+        # Reused for the narration in step 5
+        ai_client = openai.AsyncOpenAI(
             base_url="http://127.0.0.1:1234/v1",
             api_key="lm-studio"
         )
         
-        response = ai_client.chat.completions.create(
+        response = await ai_client.chat.completions.create(
             model="local-model",
             messages=[{"role": "user", "content": "Say 'Ready for D&D!'"}],
             max_tokens=10
@@ -34,6 +40,7 @@ async def test_dnd_integration():
     except Exception as e:
         print(f"   ❌ LM Studio failed: {e}")
         print("   Make sure LM Studio is running!")
+        await ai_client.close()
         return False
     
     # Test 2: MCP Server with tools
@@ -51,13 +58,33 @@ async def test_dnd_integration():
                 
                 print("   ✅ MCP Server connected")
                 
+                # Dice, combat and character creation are independent, so send them together
+                dice_result, attack_result, character_result = await asyncio.gather(
+                    session.call_tool("roll_dice", {
+                        "dice_notation": "1d20",
+                        "modifier": 5
+                    }),
+                    session.call_tool("attack_roll", {
+                        "attacker_bonus": 4,
+                        "target_ac": 15,
+                        "damage_dice": "1d8",
+                        "damage_bonus": 2
+                    }),
+                    session.call_tool("create_character", {
+                        "name": "Thorin Ironbeard",
+                        "character_class": "Fighter", 
+                        "level": 2,
+                        "strength": 16,
+                        "dexterity": 12,
+                        "constitution": 15,
+                        "intelligence": 10,
+                        "wisdom": 13,
+                        "charisma": 8
+                    })
+                )
+                
                 # Test dice rolling
                 print("\n3. Testing dice mechanics...")
-                dice_result = await session.call_tool("roll_dice", {
-                    "dice_notation": "1d20",
-                    "modifier": 5
-                })
-                
                 dice_data = dice_result.structuredContent
                 roll_value = dice_data['individual_rolls'][0]
                 total = dice_data['total']
@@ -65,13 +92,6 @@ async def test_dnd_integration():
                 
                 # Test combat
                 print("\n4. Testing combat mechanics...")
-                attack_result = await session.call_tool("attack_roll", {
-                    "attacker_bonus": 4,
-                    "target_ac": 15,
-                    "damage_dice": "1d8",
-                    "damage_bonus": 2
-                })
-                
                 attack_data = attack_result.structuredContent
                 print(f"   ⚔️  {attack_data['description']}")
                 
@@ -82,31 +102,20 @@ async def test_dnd_integration():
                 else:
                     prompt = "Dramatically describe a sword attack that narrowly misses a goblin."
                 
-                ai_response = ai_client.chat.completions.create(
+                ai_response = await ai_client.chat.completions.create(
                     model="local-model",
                     messages=[
-                        {"role": "system", "content": "You are a D&D narrator. Write 1-2 vivid sentences."},
+                        SYSTEM_NARRATOR,
                         {"role": "user", "content": prompt}
                     ],
-                    max_tokens=60
+                    max_tokens=60,
+                    extra_body=CACHE_PROMPT
                 )
                 
                 print(f"   🎭 AI Narration: {ai_response.choices[0].message.content}")
                 
                 # Test character creation
                 print("\n6. Testing character creation...")
-                character_result = await session.call_tool("create_character", {
-                    "name": "Thorin Ironbeard",
-                    "character_class": "Fighter", 
-                    "level": 2,
-                    "strength": 16,
-                    "dexterity": 12,
-                    "constitution": 15,
-                    "intelligence": 10,
-                    "wisdom": 13,
-                    "charisma": 8
-                })
-                
                 char_data = character_result.structuredContent
                 print(f"   🧙‍♂️ Created: {char_data['name']} (AC: {char_data['armor_class']}, HP: {char_data['hit_points']})")
                 
@@ -122,6 +131,9 @@ async def test_dnd_integration():
         print(f"   ❌ MCP integration failed: {e}")
         print("   Your server components work, but there might be a connection issue")
         return False
+    
+    finally:
+        await ai_client.close()
 
 if __name__ == "__main__":
     success = asyncio.run(test_dnd_integration())